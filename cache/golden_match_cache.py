@@ -0,0 +1,40 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+GOLDEN_MATCH_CACHE_SIZE = 1024
+
+
+class GoldenMatchCache:
+    """
+    Bounded in-memory LRU of golden-query similarity lookups.
+    Maps (version, question) -> [[example_index, score], ...].
+    The golden system version is part of the key, so edits to the
+    example set never produce stale hits.
+    """
+
+    def __init__(self, maxsize: int = GOLDEN_MATCH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        # Lookups come from concurrent generate_sql threads
+        self._lock = threading.Lock()
+
+    def get(self, question: str, version: str) -> Optional[list]:
+        key = (version, question)
+        with self._lock:
+            matches = self.cache.get(key)
+            if matches is not None:
+                self.cache.move_to_end(key)
+            return matches
+
+    def set(self, question: str, version: str, matches: list):
+        key = (version, question)
+        with self._lock:
+            self.cache[key] = matches
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.cache.clear()
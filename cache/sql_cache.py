@@ -3,21 +3,23 @@ import os
 import time
 import hashlib
 import re
+import threading
 from typing import Optional
 
 CACHE_TTL_SECONDS = 24 * 60 * 60  # 24 hours
 
 
 def normalize_question(q: str) -> str:
-    q = q.lower()
-    q = re.sub(r"[^\w\s]", "", q)
-    q = re.sub(r"\s+", " ", q)
-    return q.strip()
+    # Only case and whitespace; punctuation like '<' vs '>' or '4.5' vs
+    # '45' changes the meaning of the question
+    return re.sub(r"\s+", " ", q.strip().lower())
 
 
 class SQLCache:
     def __init__(self, path: str = "data/cache/sql_cache.json"):
         self.path = path
+        # Guards self.cache: generate_sql runs on several threads
+        self._lock = threading.Lock()
         os.makedirs(os.path.dirname(path), exist_ok=True)
         self._load()
 
@@ -32,30 +34,47 @@ class SQLCache:
             self.cache = {}
 
     def _persist(self):
-        with open(self.path, "w", encoding="utf-8") as f:
+        # Caller holds self._lock. Write-then-rename so readers never
+        # see a partial file.
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(self.cache, f, indent=2)
+        os.replace(tmp_path, self.path)
 
-    def _key(self, question: str) -> str:
+    def _key(self, question: str, fingerprint: str) -> str:
         norm = normalize_question(question)
-        return hashlib.sha256(norm.encode()).hexdigest()
+        return hashlib.sha256(f"{fingerprint}:{norm}".encode()).hexdigest()
 
-    def get(self, question: str) -> Optional[str]:
-        key = self._key(question)
-        entry = self.cache.get(key)
-        if not entry:
-            return None
+    def get(self, question: str, fingerprint: str = "") -> Optional[str]:
+        """
+        fingerprint identifies the prompt inputs (schema, semantic doc,
+        golden examples); SQL cached under another fingerprint never hits.
+        """
+        key = self._key(question, fingerprint)
+        with self._lock:
+            entry = self.cache.get(key)
+            if not entry:
+                return None
 
-        if time.time() - entry["ts"] > CACHE_TTL_SECONDS:
-            self.cache.pop(key, None)
-            self._persist()
-            return None
+            if time.time() - entry["ts"] > CACHE_TTL_SECONDS:
+                self.cache.pop(key, None)
+                self._persist()
+                return None
 
-        return entry["sql"]
+            return entry["sql"]
 
-    def set(self, question: str, sql: str):
-        key = self._key(question)
-        self.cache[key] = {
-            "sql": sql,
-            "ts": time.time()
-        }
-        self._persist()
+    def set(self, question: str, sql: str, fingerprint: str = ""):
+        key = self._key(question, fingerprint)
+        now = time.time()
+        with self._lock:
+            # Entries under old fingerprints are never read again; expire
+            # them here so the file doesn't grow without bound
+            self.cache = {
+                k: entry for k, entry in self.cache.items()
+                if now - entry["ts"] <= CACHE_TTL_SECONDS
+            }
+            self.cache[key] = {
+                "sql": sql,
+                "ts": now
+            }
+            self._persist()
@@ -5,6 +5,7 @@ Learns patterns from corrected queries using semantic similarity.
 
 import json
 import os
+import hashlib
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
@@ -18,6 +19,8 @@ except ImportError:
     print("WARNING: sentence-transformers not installed. Golden queries will use exact matching only.")
     print("Install with: pip install sentence-transformers")
 
+EMBEDDING_CACHE_DIR = Path("data/cache")
+
 
 @dataclass
 class GoldenExample:
@@ -56,8 +59,9 @@ class GoldenQuerySystem:
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Setup embeddings
+        self.model_name = model_name
         self.encoder = None
-        self.embeddings_matrix = None
+        self.embeddings_matrix = None  # unit-length rows, float32
         
         if EMBEDDINGS_AVAILABLE:
             try:
@@ -70,6 +74,7 @@ class GoldenQuerySystem:
         
         # Load examples
         self.examples: List[GoldenExample] = []
+        self.version = ""  # content fingerprint, changes whenever examples change
         self._load()
     
     def _load(self):
@@ -88,6 +93,7 @@ class GoldenQuerySystem:
             ]
             
             print(f"[Golden Queries] Loaded {len(self.examples)} golden examples")
+            self._update_version()
             
             # Rebuild embeddings if encoder available
             if self.encoder:
@@ -115,6 +121,17 @@ class GoldenQuerySystem:
             json.dump(data, f, indent=2, ensure_ascii=False)
         
         print(f"[Golden Queries] Saved {len(self.examples)} examples to {self.storage_path}")
+        self._update_version()
+    
+    def _update_version(self):
+        """Fingerprint the example set so downstream caches can detect edits."""
+        digest = hashlib.sha256()
+        for ex in self.examples:
+            digest.update(ex.question.encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(ex.sql.encode("utf-8"))
+            digest.update(b"\0")
+        self.version = digest.hexdigest()[:16]
     
     def _initialize_with_defaults(self):
         """Initialize with a few critical examples."""
@@ -174,15 +191,60 @@ WHERE LOWER(ms.name) LIKE LOWER('%approved%')""",
         if not self.encoder or not self.examples:
             return
         
+        # Saved per (model, example set); every client maps the same pages
+        cache_path = self._embedding_cache_path()
+        if cache_path.exists():
+            try:
+                matrix = np.load(cache_path, mmap_mode='r')
+                if matrix.shape[0] == len(self.examples):
+                    self.embeddings_matrix = matrix
+                    print(f"[Golden Queries] Embeddings mapped from {cache_path}")
+                    return
+            except (OSError, ValueError):
+                pass
+        
         print("[Golden Queries] Building embeddings...")
         questions = [ex.question for ex in self.examples]
-        self.embeddings_matrix = self.encoder.encode(
-            questions,
-            convert_to_tensor=False,
-            show_progress_bar=False
+        matrix = np.asarray(
+            self.encoder.encode(
+                questions,
+                convert_to_tensor=False,
+                show_progress_bar=False
+            ),
+            dtype=np.float32
         )
+        # Normalize once so cosine similarity is a plain inner product
+        self.embeddings_matrix = matrix / self._norms(matrix)
+        self._save_embeddings(cache_path)
         print(f"[Golden Queries] Embeddings ready for {len(self.examples)} examples")
     
+    def _embedding_cache_path(self) -> Path:
+        model = self.model_name.replace("/", "_")
+        return EMBEDDING_CACHE_DIR / f"golden_{model}_{self.version}_unit.npy"
+    
+    def _save_embeddings(self, cache_path: Path):
+        """Write the matrix atomically and drop files for older example sets."""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename: concurrent builders never expose a partial file
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, self.embeddings_matrix)
+            os.replace(tmp_path, cache_path)
+            
+            model = self.model_name.replace("/", "_")
+            for stale in cache_path.parent.glob(f"golden_{model}_*.npy"):
+                if stale != cache_path:
+                    stale.unlink()
+        except OSError as e:
+            print(f"[Golden Queries] Could not cache embeddings: {e}")
+    
+    @staticmethod
+    def _norms(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return norms
+    
     def find_similar(
         self,
         question: str,
@@ -223,25 +285,25 @@ WHERE LOWER(ms.name) LIKE LOWER('%approved%')""",
         threshold: float
     ) -> List[Tuple[GoldenExample, float]]:
         """Semantic similarity search using embeddings."""
-        # Encode query
-        query_embedding = self.encoder.encode(
-            question,
-            convert_to_tensor=False,
-            show_progress_bar=False
-        )
-        
-        # Compute cosine similarities
-        similarities = np.dot(self.embeddings_matrix, query_embedding) / (
-            np.linalg.norm(self.embeddings_matrix, axis=1) * 
-            np.linalg.norm(query_embedding)
-        )
+        # Encode query as a unit row vector
+        query_embedding = np.asarray(
+            self.encoder.encode(
+                question,
+                convert_to_tensor=False,
+                show_progress_bar=False
+            ),
+            dtype=np.float32
+        ).reshape(1, -1)
+        query_embedding /= self._norms(query_embedding)
         
-        # Get top-k
+        # Rows are unit length, so inner product = cosine similarity.
+        # One matvec straight over the mapped matrix; no private copy.
+        similarities = self.embeddings_matrix @ query_embedding[0]
         top_indices = np.argsort(similarities)[::-1][:top_k]
+        top = [(int(i), float(similarities[i])) for i in top_indices]
         
         results = []
-        for idx in top_indices:
-            score = float(similarities[idx])
+        for idx, score in top:
             if score >= threshold:
                 results.append((self.examples[idx], score))
                 print(f"[Golden Queries] Similar example found (score: {score:.3f})")
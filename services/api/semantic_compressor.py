@@ -7,9 +7,12 @@ Combines:
 """
 
 import re
+import functools
 from typing import List, Dict
 from pathlib import Path
 
+COMPRESS_CACHE_SIZE = 1024
+
 
 class SemanticCompressor:
     """
@@ -159,6 +162,9 @@ class SemanticCompressor:
         # 7: Name Matching
         # 11: Schema Integrity
         self.core_sections = [1, 2, 3, 4, 5, 7, 11]  
+
+        # question_lower -> compressed doc (lru_cache is thread-safe)
+        self._compress_cached = functools.lru_cache(maxsize=COMPRESS_CACHE_SIZE)(self._compress)
     
     def _parse_sections(self) -> Dict[int, str]:
         """Parse semantic doc into numbered sections."""
@@ -189,8 +195,14 @@ class SemanticCompressor:
     
     def compress(self, question: str) -> str:
         """Extract only relevant sections based on question keywords."""
-        question_lower = question.lower()
-        
+        # Output depends only on the lower-cased question
+        return self._compress_cached(question.lower())
+
+    def compress_batch(self, questions: List[str]) -> List[str]:
+        """compress() for several questions; duplicates are computed once."""
+        return [self.compress(q) for q in questions]
+
+    def _compress(self, question_lower: str) -> str:
         # Start with CORE sections (The safety net)
         relevant_sections = set(self.core_sections)
         
@@ -3,21 +3,39 @@ from __future__ import annotations
 import os
 import json
 import re
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 from urllib.parse import quote_plus
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 from sqlalchemy import create_engine
 from sqlalchemy.engine.base import Engine
 from services.api.sql_refiner import refine_sql
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 # Import new components
 from services.api.semantic_compressor import SemanticCompressor
 from services.api.golden_queries import GoldenQuerySystem
-from services.api.sql_validator import SQLValidator
+from services.api.sql_validator import VALIDATOR
+from cache.golden_match_cache import GoldenMatchCache
+from cache.sql_cache import SQLCache
 
 # ------------------------------------------------------------------
 # Logging
@@ -38,13 +56,69 @@ if not logger.handlers:
 MAX_ROW_LIMIT = int(os.getenv("MAX_ROW_LIMIT", "1000"))
 MAX_RETRY_ATTEMPTS = int(os.getenv("MAX_SQL_RETRY_ATTEMPTS", "2"))
 
+# Above this row limit, execute_sql reads through a server-side cursor in chunks
+STREAM_ROW_THRESHOLD = 10000
+STREAM_CHUNK_SIZE = int(os.getenv("SQL_STREAM_CHUNK_SIZE", "500"))
+
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Race a conservative prompt variant when the golden match is weak.
+# Opt-in: most questions fall below the threshold, so this doubles Groq calls.
+SPECULATIVE_GENERATION = os.getenv("SQL_SPECULATIVE_GENERATION", "false").lower() == "true"
+SPECULATIVE_SIMILARITY_THRESHOLD = float(os.getenv("SQL_SPECULATIVE_SIMILARITY_THRESHOLD", "0.85"))
+
+# Shared keep-alive session for Groq calls (reuses TCP/TLS across retries)
+_GROQ_SESSION = requests.Session()
+_GROQ_SESSION.mount(
+    "https://",
+    HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0),
+)
+
 # Regex to block dangerous write operations
 _WRITE_OPS_RE = re.compile(
     r"\b(insert|update|delete|truncate|drop|alter|create|replace|merge)\b",
     re.I,
 )
+# Literal keywords behind _WRITE_OPS_RE; cheap substring pre-check
+_WRITE_KEYWORDS = (
+    "insert", "update", "delete", "truncate", "drop",
+    "alter", "create", "replace", "merge",
+)
+
+# Linear-time multi-keyword scan when pyahocorasick is installed;
+# otherwise validate_sql falls back to _WRITE_OPS_RE
+try:
+    import ahocorasick
+    _WRITE_AC = ahocorasick.Automaton()
+    for _kw in _WRITE_KEYWORDS:
+        _WRITE_AC.add_word(_kw, _kw)
+    _WRITE_AC.make_automaton()
+except ImportError:
+    _WRITE_AC = None
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _contains_write_op(sql_lower: str) -> bool:
+    """Aho-Corasick keyword scan with the same \\b semantics as _WRITE_OPS_RE."""
+    last = len(sql_lower) - 1
+    for end, kw in _WRITE_AC.iter(sql_lower):
+        start = end - len(kw) + 1
+        if start > 0 and _is_word_char(sql_lower[start - 1]):
+            continue
+        if end < last and _is_word_char(sql_lower[end + 1]):
+            continue
+        return True
+    return False
 
 
+# Keyword locators for _clean_sql / validate_sql (avoid .upper() copies)
+_WITH_RE = re.compile(r"\bWITH\b", re.IGNORECASE)
+_SELECT_RE = re.compile(r"\bSELECT\b", re.IGNORECASE)
+_STARTS_SELECT_WITH = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
 
 def extract_explicit_dates_from_question(question: str) -> tuple[str, str] | None:
     """
@@ -122,6 +196,83 @@ def extract_explicit_dates_from_question(question: str) -> tuple[str, str] | Non
             return (start_date, end_date)
     
     return None
+
+
+# ------------------------------------------------------------------
+# Static prompt blocks (formatted per call, never rebuilt line by line)
+# ------------------------------------------------------------------
+
+_PROMPT_SEP = "=" * 70
+
+_PROMPT_HEADER = "You are an expert SQL generator for EMS databases.\n"
+
+_DATE_BLOCK_TMPL = """{sep}
+ EXPLICIT DATE RANGE DETECTED 
+{sep}
+
+The question mentions a specific date range.
+You MUST use these EXACT dates in your SQL:
+
+  Start: {start}
+  End (exclusive): {end}
+
+MANDATORY SQL:
+  WHERE date_column >= '{start}'
+  AND date_column < '{end}'
+
+DO NOT use DATE_SUB, CURDATE(), or INTERVAL for this query.
+Use the LITERAL dates shown above.
+
+{sep}
+"""
+
+_FOLLOWUP_HEAD_TMPL = """{sep}
+⚠️  FOLLOW-UP QUERY - ENTITY SCOPE RESTRICTION ⚠️
+{sep}
+
+This query MUST filter to ONLY these {count} specific entities:
+"""
+
+_FOLLOWUP_TAIL_TMPL = """
+MANDATORY SQL REQUIREMENT:
+Your WHERE clause MUST include one of:
+  • WHERE u.full_name IN ('entity1', 'entity2', ...)
+  • WHERE ai.account_name IN (...)
+  • WHERE wi.warehouse_name IN (...)
+
+Use LIKE for each entity: u.full_name LIKE '%entity%'
+Or use IN clause with exact names from list above.
+
+{sep}
+"""
+
+_SIMILAR_EXAMPLE_FOOTER = """
+IMPORTANT: Adapt this pattern to the new question. Notice:
+- How status filtering is done (master_status join + LIKE)
+- How time calculations work (updated_at - created_at)
+- How geography is resolved (warehouse → quick_code_master)
+"""
+
+_TIME_CONTEXT_TMPL = """=== SYSTEM TIME CONTEXT ===
+Current System Date: {today} ({weekday})
+Current Month: {month}
+CRITICAL: All relative dates (e.g., 'last 6 months', 'this year') MUST be calculated relative to the Current System Date.
+"""
+
+_TASK_HEAD_TMPL = """=== YOUR TASK ===
+Question: {question}
+
+Instructions:
+1. Follow the CRITICAL RULES exactly"""
+
+_TASK_TAIL = """3. Generate valid MySQL compatible SQL
+4. Use fully qualified table names with backticks: `ems-portal-service`.`invoice_info`
+5. Return ONLY the SQL. No markdown, no explanations.
+4. Use snake_case for aliases (e.g. `vendor_name`, NOT `Vendor Name`).
+5. Filter by `user_type` when querying the `user` table (e.g. user_type LIKE '%VENDOR%').
+
+SQL:"""
+
 # ------------------------------------------------------------------
 # Enhanced SQL Client
 # ------------------------------------------------------------------
@@ -141,6 +292,8 @@ class SQLClient:
         schema_path: Optional[str] = None,
         semantic_path: Optional[str] = None,
         db_url_override: Optional[str] = None,
+        engine: Optional[Engine] = None,
+        sql_cache_path: Optional[str] = None,
     ):
         # 1. Resolve Paths
         self.schema_path = schema_path or self._find_file("schemas_from_mdl.json")
@@ -149,11 +302,19 @@ class SQLClient:
         self.schema_json: Dict[str, Any] = {}
         self.semantic_doc: str = ""
         self.db_url_override = db_url_override
-        self.engine: Optional[Engine] = None
+        # A caller-supplied engine (e.g. tests) is used as-is by _get_engine()
+        self.engine: Optional[Engine] = engine
 
         # 2. Load Data
         self._load_schema()
         self._load_semantics()
+
+        # Schema + semantic doc shape every prompt; part of the SQL cache key
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.schema_json, sort_keys=True).encode())
+        digest.update(b"\0")
+        digest.update(self.semantic_doc.encode())
+        self._prompt_inputs_digest = digest.hexdigest()[:16]
         
         # 3. Initialize new components
         logger.info("Initializing enhanced SQL generation system...")
@@ -175,10 +336,16 @@ class SQLClient:
             logger.error(f"Failed to initialize golden queries: {e}")
             self.golden_system = None
         
-        # Validator (safety net)
-        self.validator = SQLValidator()
+        # Validator (safety net); schema-less, so the shared instance
+        self.validator = VALIDATOR
         logger.info("✓ SQL validator ready")
 
+        # In-memory LRU of golden similarity lookups (created on first use)
+        self._similar_cache: Optional[GoldenMatchCache] = None
+
+        # Persistent question -> validated SQL cache (normalized exact match)
+        self.sql_cache = SQLCache(sql_cache_path) if sql_cache_path else SQLCache()
+
     def _find_file(self, filename: str) -> str:
         """Helper to find config files in typical locations."""
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -232,16 +399,25 @@ class SQLClient:
             question: The refined analytical question
             context_entities: List of entities from previous result (for follow-ups)
         """
-        import requests
+        # Same (normalized) question already answered with valid SQL.
+        # Follow-ups depend on context_entities, so they bypass the cache.
+        if not context_entities:
+            cached_sql = self.sql_cache.get(question, self._sql_cache_fingerprint())
+            if cached_sql:
+                logger.info("[SQL Cache] Hit; skipping generation")
+                return cached_sql
         
         # Groq API configuration
         groq_api_key = os.getenv("GROQ_API_KEY_1")
         if not groq_api_key:
             raise RuntimeError("GROQ_API_KEY_1 not set in environment variables")
         
-        groq_url = "https://api.groq.com/openai/v1/chat/completions"
         model = os.getenv("GROQ_SQL_MODEL", "llama-3.1-70b-versatile")
         
+        # Freeze "now" for the whole generation so retries see the same date
+        now = datetime.now()
+        now_strs = (now.strftime('%Y-%m-%d'), now.strftime('%A'), now.strftime('%B %Y'))
+        
         # ============================================================
         # STAGE 1: Check Golden Queries for Similar Examples
         # ============================================================
@@ -249,7 +425,7 @@ class SQLClient:
         if self.golden_system:
             # Find similar examples to use as learning patterns
             # We use threshold=0.60 to catch relevant patterns even if not exact
-            similar_examples = self.golden_system.find_similar(question, top_k=1, threshold=0.75)
+            similar_examples = self._find_similar_examples(question)
             
             if similar_examples:
                 score = similar_examples[0][1]
@@ -257,6 +433,14 @@ class SQLClient:
         else:
             similar_examples = []
         
+        # Weak golden match → first attempt is likely to fail validation,
+        # so race a conservative (uncompressed) prompt alongside it
+        speculative = (
+            SPECULATIVE_GENERATION
+            and self.compressor is not None
+            and (not similar_examples or similar_examples[0][1] < SPECULATIVE_SIMILARITY_THRESHOLD)
+        )
+        
         # ============================================================
         # STAGE 2: Generate with Enhanced Prompt
         # ============================================================
@@ -275,38 +459,28 @@ class SQLClient:
                 question=question,
                 similar_examples=similar_examples,  # Always inject if available
                 retry_feedback=retry_feedback,
-                context_entities=context_entities
+                context_entities=context_entities,
+                now_strs=now_strs
             )
             
-            # Generate SQL using Groq API
-            try:
-                resp = requests.post(
-                    groq_url,
-                    headers={
-                        "Authorization": f"Bearer {groq_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.0,
-                        "max_tokens": 2048
-                    },
-                    timeout=60
-                )
-                resp.raise_for_status()
-                content = resp.json()["choices"][0]["message"]["content"]
-                sql = self._clean_sql(content)
-                
-            except Exception as e:
-                logger.error(f"Groq API Error: {e}")
-                raise
-            
             # ============================================================
-            # STAGE 3: Validate Generated SQL
+            # STAGE 3: Generate + Validate SQL
             # ============================================================
             
-            violations = self.validator.validate(sql, question)
+            if attempt == 0 and speculative:
+                conservative_prompt = self._build_enhanced_prompt(
+                    question=question,
+                    similar_examples=similar_examples,
+                    context_entities=context_entities,
+                    compress=False,
+                    now_strs=now_strs
+                )
+                sql, violations = self._generate_speculative(
+                    question, [prompt, conservative_prompt], groq_api_key, model
+                )
+            else:
+                sql = self._clean_sql(self._call_groq(prompt, groq_api_key, model))
+                violations = self.validator.validate(sql, question)
             
             if not violations:
                 # Success!
@@ -317,6 +491,13 @@ class SQLClient:
                 if attempt > 0 or not similar_examples:
                     self._log_successful_generation(question, sql, attempt)
                 
+                if not context_entities:
+                    # A failed cache write must not fail the generation
+                    try:
+                        self.sql_cache.set(question, sql, self._sql_cache_fingerprint())
+                    except Exception as e:
+                        logger.warning(f"[SQL Cache] Could not store SQL: {e}")
+                
                 return sql
             
             # ============================================================
@@ -341,18 +522,112 @@ class SQLClient:
         # Should never reach here
         return sql
 
+    def _sql_cache_fingerprint(self) -> str:
+        """Identifies every input that shapes the prompt, for SQLCache keys."""
+        golden_version = self.golden_system.version if self.golden_system else ""
+        return f"{self._prompt_inputs_digest}:{golden_version}"
+
+    def _call_groq(self, prompt: str, api_key: str, model: str) -> str:
+        """Send one prompt to Groq and return the raw completion text."""
+        try:
+            resp = _GROQ_SESSION.post(
+                GROQ_URL,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                    "Accept-Encoding": "gzip",
+                },
+                json={
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.0,
+                    "max_tokens": 2048
+                },
+                timeout=60
+            )
+            resp.raise_for_status()
+            return _json_loads(resp.content)["choices"][0]["message"]["content"]
+            
+        except Exception as e:
+            logger.error(f"Groq API Error: {e}")
+            raise
+
+    def _generate_speculative(self, question: str, prompts: list, api_key: str, model: str) -> tuple:
+        """
+        Fire prompt variants in parallel; return the first (sql, violations)
+        that validates cleanly. Falls back to the primary prompt's result.
+        """
+        logger.info(f"[Speculative] Racing {len(prompts)} prompt variants")
+        executor = ThreadPoolExecutor(max_workers=len(prompts))
+        futures = {executor.submit(self._call_groq, p, api_key, model): i for i, p in enumerate(prompts)}
+        results = {}
+        errors = {}
+        
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    sql = self._clean_sql(future.result())
+                except Exception as e:
+                    errors[i] = e
+                    continue
+                
+                violations = self.validator.validate(sql, question)
+                if not violations:
+                    logger.info(f"[Speculative] Variant {i} produced valid SQL")
+                    return sql, violations
+                results[i] = (sql, violations)
+        finally:
+            # Don't wait on the loser
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if not results:
+            raise errors[0] if 0 in errors else next(iter(errors.values()))
+        return results.get(0) or next(iter(results.values()))
+
+    def _find_similar_examples(self, question: str) -> list:
+        """
+        Golden similarity lookup, memoized in a bounded in-memory LRU.
+        Cache entries are keyed by the golden system version, so
+        any edit to the example set bypasses older entries.
+        """
+        if self._similar_cache is None:
+            self._similar_cache = GoldenMatchCache()
+
+        version = self.golden_system.version
+        examples = self.golden_system.examples
+
+        cached = self._similar_cache.get(question, version)
+        if cached is not None:
+            return [(examples[idx], score) for idx, score in cached]
+
+        similar = self.golden_system.find_similar(question, top_k=1, threshold=0.75)
+
+        index_of = {id(ex): i for i, ex in enumerate(examples)}
+        self._similar_cache.set(
+            question,
+            version,
+            [[index_of[id(ex)], score] for ex, score in similar],
+        )
+        return similar
+
     def _build_enhanced_prompt(
         self,
         question: str,
         similar_examples: list,
         retry_feedback: str = "",
-        context_entities: list = None
+        context_entities: list = None,
+        compress: bool = True,
+        now_strs: tuple = None
     ) -> str:
         """
         Build optimized prompt with:
-        - Compressed semantics (relevant sections only)
+        - Compressed semantics (relevant sections only, unless compress=False)
         - Golden example if available
         - Retry feedback if this is a retry attempt
+        
+        now_strs: (date, weekday, month) strings for the system time block;
+        computed from datetime.now() when not supplied.
         """
         
         # 🔒 DEFENSIVE: context_entities must be a list
@@ -366,49 +641,22 @@ class SQLClient:
 
         # Get compressed semantic doc
         if self.compressor:
-            semantic_doc = self.compressor.compress(question)
+            semantic_doc = self.compressor.compress(question) if compress else self.compressor.full_doc
             critical_rules = self.compressor.get_critical_rules_for_query(question)
         else:
             semantic_doc = self.semantic_doc
             critical_rules = []
         
         # Build prompt
-        prompt_parts = []
-        
-        # Header
-        prompt_parts.append("You are an expert SQL generator for EMS databases.")
-        prompt_parts.append("")
+        prompt_parts = [_PROMPT_HEADER]
 
         explicit_dates = extract_explicit_dates_from_question(question)
         if explicit_dates:
             start_date, end_date = explicit_dates
-            prompt_parts.append("=" * 70)
-            prompt_parts.append(" EXPLICIT DATE RANGE DETECTED ")
-            prompt_parts.append("=" * 70)
-            prompt_parts.append("")
-            prompt_parts.append(f"The question mentions a specific date range.")
-            prompt_parts.append(f"You MUST use these EXACT dates in your SQL:")
-            prompt_parts.append("")
-            prompt_parts.append(f"  Start: {start_date}")
-            prompt_parts.append(f"  End (exclusive): {end_date}")
-            prompt_parts.append("")
-            prompt_parts.append("MANDATORY SQL:")
-            prompt_parts.append(f"  WHERE date_column >= '{start_date}'")
-            prompt_parts.append(f"  AND date_column < '{end_date}'")
-            prompt_parts.append("")
-            prompt_parts.append("DO NOT use DATE_SUB, CURDATE(), or INTERVAL for this query.")
-            prompt_parts.append("Use the LITERAL dates shown above.")
-            prompt_parts.append("")
-            prompt_parts.append("=" * 70)
-            prompt_parts.append("")
+            prompt_parts.append(_DATE_BLOCK_TMPL.format(sep=_PROMPT_SEP, start=start_date, end=end_date))
         
         if context_entities and len(context_entities) > 0:
-            prompt_parts.append("=" * 70)
-            prompt_parts.append("⚠️  FOLLOW-UP QUERY - ENTITY SCOPE RESTRICTION ⚠️")
-            prompt_parts.append("=" * 70)
-            prompt_parts.append("")
-            prompt_parts.append(f"This query MUST filter to ONLY these {len(context_entities)} specific entities:")
-            prompt_parts.append("")
+            prompt_parts.append(_FOLLOWUP_HEAD_TMPL.format(sep=_PROMPT_SEP, count=len(context_entities)))
             
             for i, entity in enumerate(context_entities[:15], 1):
                 prompt_parts.append(f"  {i}. {entity}")
@@ -416,20 +664,7 @@ class SQLClient:
             if len(context_entities) > 15:
                 prompt_parts.append(f"  ... and {len(context_entities) - 15} more")
             
-            prompt_parts.append("")
-            prompt_parts.append("MANDATORY SQL REQUIREMENT:")
-            prompt_parts.append("Your WHERE clause MUST include one of:")
-            prompt_parts.append("  • WHERE u.full_name IN ('entity1', 'entity2', ...)")
-            prompt_parts.append("  • WHERE ai.account_name IN (...)")
-            prompt_parts.append("  • WHERE wi.warehouse_name IN (...)")
-            prompt_parts.append("")
-            prompt_parts.append("Use LIKE for each entity: u.full_name LIKE '%entity%'")
-            prompt_parts.append("Or use IN clause with exact names from list above.")
-            prompt_parts.append("")
-            prompt_parts.append("=" * 70)
-            prompt_parts.append("")
-
-        
+            prompt_parts.append(_FOLLOWUP_TAIL_TMPL.format(sep=_PROMPT_SEP))
 
         # Critical rules (highlighted)
         if critical_rules:
@@ -443,16 +678,11 @@ class SQLClient:
             example, score = similar_examples[0]
             prompt_parts.append(f"=== SIMILAR EXAMPLE (Learn from this pattern, similarity: {score:.2f}) ===")
             prompt_parts.append(f"Question: {example.question}")
-            prompt_parts.append(f"Correct SQL:")
+            prompt_parts.append("Correct SQL:")
             prompt_parts.append(example.sql)
             if example.notes:
                 prompt_parts.append(f"Why this is correct: {example.notes}")
-            prompt_parts.append("")
-            prompt_parts.append("IMPORTANT: Adapt this pattern to the new question. Notice:")
-            prompt_parts.append("- How status filtering is done (master_status join + LIKE)")
-            prompt_parts.append("- How time calculations work (updated_at - created_at)")
-            prompt_parts.append("- How geography is resolved (warehouse → quick_code_master)")
-            prompt_parts.append("")
+            prompt_parts.append(_SIMILAR_EXAMPLE_FOOTER)
         
         # Semantic rules
         prompt_parts.append("=== SEMANTIC BUSINESS RULES ===")
@@ -464,32 +694,21 @@ class SQLClient:
         prompt_parts.append(self._build_schema_context())
         prompt_parts.append("")
         
-        now = datetime.now()
-        prompt_parts.append("=== SYSTEM TIME CONTEXT ===")
-        prompt_parts.append(f"Current System Date: {now.strftime('%Y-%m-%d')} ({now.strftime('%A')})")
-        prompt_parts.append(f"Current Month: {now.strftime('%B %Y')}")
-        prompt_parts.append("CRITICAL: All relative dates (e.g., 'last 6 months', 'this year') MUST be calculated relative to the Current System Date.")
-        prompt_parts.append("")
+        if now_strs is None:
+            now = datetime.now()
+            now_strs = (now.strftime('%Y-%m-%d'), now.strftime('%A'), now.strftime('%B %Y'))
+        today, weekday, month = now_strs
+        prompt_parts.append(_TIME_CONTEXT_TMPL.format(today=today, weekday=weekday, month=month))
 
         # Retry feedback (if this is a retry)
         if retry_feedback:
             prompt_parts.append(retry_feedback)
         
         # Task
-        prompt_parts.append("=== YOUR TASK ===")
-        prompt_parts.append(f"Question: {question}")
-        prompt_parts.append("")
-        prompt_parts.append("Instructions:")
-        prompt_parts.append("1. Follow the CRITICAL RULES exactly")
+        prompt_parts.append(_TASK_HEAD_TMPL.format(question=question))
         if similar_examples:
             prompt_parts.append("2. Adapt the pattern from the SIMILAR EXAMPLE above")
-        prompt_parts.append("3. Generate valid MySQL compatible SQL")
-        prompt_parts.append("4. Use fully qualified table names with backticks: `ems-portal-service`.`invoice_info`")
-        prompt_parts.append("5. Return ONLY the SQL. No markdown, no explanations.")
-        prompt_parts.append("4. Use snake_case for aliases (e.g. `vendor_name`, NOT `Vendor Name`).")
-        prompt_parts.append("5. Filter by `user_type` when querying the `user` table (e.g. user_type LIKE '%VENDOR%').")
-        prompt_parts.append("")
-        prompt_parts.append("SQL:")
+        prompt_parts.append(_TASK_TAIL)
         
         return "\n".join(prompt_parts)
 
@@ -500,9 +719,10 @@ class SQLClient:
         clean = clean.strip()
         
         # Case-insensitive search for start positions
-        upper_clean = clean.upper()
-        idx_with = upper_clean.find("WITH")
-        idx_select = upper_clean.find("SELECT")
+        m_with = _WITH_RE.search(clean)
+        m_select = _SELECT_RE.search(clean)
+        idx_with = m_with.start() if m_with else -1
+        idx_select = m_select.start() if m_select else -1
         
         # Logic: If 'WITH' exists and is before 'SELECT', start there.
         # Otherwise, look for 'SELECT'.
@@ -568,7 +788,7 @@ class SQLClient:
         # [END CHANGED BLOCK]
             
         # 2. List columns
-        for col in info.get("columns", [])[:10]:
+        for col in islice(info.get("columns") or (), 10):
             lines.append(f" - {col.get('name')} ({col.get('type')})")
         
         lines.append("")
@@ -603,15 +823,47 @@ class SQLClient:
     # Execution (Database)
     # ------------------------------------------------------------------
 
-    def execute_sql(self, sql: str) -> pd.DataFrame:
-        # Refine SQL (semantic fixes)
-        sql = refine_sql(sql)
+    def ask(self, question: str, return_format: str = "pandas"):
+        """
+        Generate SQL for a question and execute it.
+        return_format: "pandas" (DataFrame) or "arrow" (pyarrow.Table).
+        """
+        if return_format not in ("pandas", "arrow"):
+            raise ValueError(f"Unsupported return_format: {return_format}")
 
-        # Validate
-        self.validate_sql(sql)
+        sql = self.generate_sql(question)
+        if return_format == "arrow":
+            return self.execute_sql_arrow(sql)
+        return self.execute_sql(sql)
 
-        # 🔒 EXECUTION-SAFETY: escape % for SQLAlchemy / PyMySQL
-        sql = sql.replace('%', '%%')
+    def execute_sql_arrow(self, sql: str) -> "pa.Table":
+        """
+        Execute SQL and build a pyarrow Table straight from the fetched rows,
+        skipping pandas DataFrame construction.
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Arrow results")
+
+        sql = self._prepare_sql(sql)
+        engine = self._get_engine()
+
+        logger.info("Executing SQL (arrow)...")
+        with engine.connect() as conn:
+            # Driver-level execution, like pd.read_sql on a string
+            result = conn.exec_driver_sql(sql)
+            names = list(result.keys())
+            rows = result.fetchall()
+
+        columns = list(zip(*rows)) if rows else [() for _ in names]
+        return pa.Table.from_arrays([pa.array(col) for col in columns], names=names)
+
+    def execute_sql(self, sql: str) -> pd.DataFrame:
+        # Large result sets: accumulate from the server-side cursor instead
+        # of letting the driver buffer every row up front
+        if MAX_ROW_LIMIT > STREAM_ROW_THRESHOLD:
+            return pd.concat(self.execute_sql_streaming(sql), ignore_index=True)
+
+        sql = self._prepare_sql(sql)
 
         # Get Engine
         engine = self._get_engine()
@@ -620,14 +872,51 @@ class SQLClient:
         logger.info("Executing SQL...")
         return pd.read_sql(sql, con=engine)
 
+    def execute_sql_streaming(
+        self,
+        sql: str,
+        chunksize: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Execute SQL and yield the result in DataFrame chunks.
+        Uses a server-side cursor (stream_results) so rows are not
+        buffered by the driver before pandas sees them.
+        """
+        sql = self._prepare_sql(sql)
+        engine = self._get_engine()
+
+        logger.info(f"Executing SQL (streaming, chunksize={chunksize})...")
+        with engine.connect().execution_options(stream_results=True) as conn:
+            yield from pd.read_sql(sql, conn, chunksize=chunksize)
+
+    def _prepare_sql(self, sql: str) -> str:
+        # Refine SQL (semantic fixes)
+        sql = refine_sql(sql)
+
+        # Validate
+        self.validate_sql(sql)
+
+        # 🔒 EXECUTION-SAFETY: escape % for SQLAlchemy / PyMySQL
+        if '%' in sql:
+            sql = sql.replace('%', '%%')
+        return sql
+
     def validate_sql(self, sql: str):
-        upper_sql = sql.strip().upper()
-        
         # FIX: Allow 'WITH' for CTEs alongside 'SELECT'
-        if not (upper_sql.startswith("SELECT") or upper_sql.startswith("WITH")):
+        if not _STARTS_SELECT_WITH.match(sql):
             raise ValueError("Only SELECT or WITH (CTE) queries allowed.")
             
-        if _WRITE_OPS_RE.search(sql):
+        # Fast path: no keyword substring → no word-boundary match possible
+        sql_lower = sql.lower()
+        if not any(kw in sql_lower for kw in _WRITE_KEYWORDS):
+            return
+
+        if _WRITE_AC is not None:
+            has_write_op = _contains_write_op(sql_lower)
+        else:
+            has_write_op = _WRITE_OPS_RE.search(sql) is not None
+        
+        if has_write_op:
             raise ValueError("Write operations forbidden.")
 
     def _get_engine(self) -> Engine:
@@ -670,6 +959,10 @@ class SQLClient:
             return False
         
         self.golden_system.add_example(question, sql, notes, tags)
+        if self._similar_cache is not None:
+            self._similar_cache.clear()
+        # The new golden version also changes the SQL cache fingerprint,
+        # so SQL cached before this correction is no longer served
         logger.info(f"✓ Added golden query. System will learn from this pattern.")
         return True
     
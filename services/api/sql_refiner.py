@@ -16,7 +16,7 @@ IDENT = r"(?:`?[a-zA-Z_][a-zA-Z0-9_]*`?)"
 _SCHEMA_WITH_HYPHEN_RE = re.compile(
     r"""
     (?<!`)
-    (?P<schema>[a-zA-Z_][a-zA-Z0-9_-]*-[a-zA-Z0-9_-]*)
+    (?P<schema>[a-zA-Z_][a-zA-Z0-9_]*(?:-[a-zA-Z0-9_]*)+)
     \.
     (?P<table>`?[a-zA-Z_][a-zA-Z0-9_]*`?)
     """,
@@ -25,6 +25,9 @@ _SCHEMA_WITH_HYPHEN_RE = re.compile(
 
 
 def _fix_hyphenated_schema_names(sql: str) -> str:
+    if "-" not in sql:
+        return sql
+
     def repl(match: re.Match) -> str:
         schema = match.group("schema")
         table = match.group("table")
@@ -55,11 +58,14 @@ _QUICK_CODE_ALIAS_RE = re.compile(
     flags=re.IGNORECASE | re.VERBOSE,
 )
 
-_JOIN_ON_RE_TEMPLATE = rf"""
-ON\s+
-(?P<lhs>[^=]+?)\s*=\s*
-(?P<rhs>{IDENT}\.\w+)
-"""
+_JOIN_ON_RE = re.compile(
+    rf"""
+    ON\s+
+    (?P<lhs>[^=]+)=\s*
+    (?P<qualifier>{IDENT})\.\w+
+    """,
+    flags=re.IGNORECASE | re.VERBOSE,
+)
 
 
 def _find_quick_code_aliases(sql: str) -> set[str]:
@@ -70,24 +76,27 @@ def _find_quick_code_aliases(sql: str) -> set[str]:
 
 
 def _fix_quick_code_joins(sql: str) -> str:
-    aliases = _find_quick_code_aliases(sql)
+    if "quick_code_master" not in sql.lower():
+        return sql
+
+    aliases = {a.lower(): a for a in _find_quick_code_aliases(sql)}
     if not aliases:
         return sql
 
     total_fixes = 0
 
-    for alias in aliases:
-        join_on_re = re.compile(
-            _JOIN_ON_RE_TEMPLATE.replace("{IDENT}", alias),
-            flags=re.IGNORECASE | re.VERBOSE,
-        )
-
-        def repl(match: re.Match) -> str:
-            lhs = match.group("lhs").strip()
-            return f"ON {lhs} = {alias}.id"
+    # One pass over every ON clause; only those whose right-hand side
+    # is qualified by a quick_code_master alias are rewritten
+    def repl(match: re.Match) -> str:
+        nonlocal total_fixes
+        alias = aliases.get(match.group("qualifier").strip("`").lower())
+        if alias is None:
+            return match.group(0)
+        total_fixes += 1
+        lhs = match.group("lhs").strip()
+        return f"ON {lhs} = {alias}.id"
 
-        sql, count = join_on_re.subn(repl, sql)
-        total_fixes += count
+    sql = _JOIN_ON_RE.sub(repl, sql)
 
     if total_fixes:
         logger.info(
@@ -100,14 +109,29 @@ def _fix_quick_code_joins(sql: str) -> str:
 
 # -------------------------------------------------
 # Rule 2 — HARD invariant: account_name MUST be fuzzy
+# Rule 3 — HARD invariant: region / city / warehouse fuzzy
+#
+# Both rules rewrite `<col> = '<val>'` to LIKE and run back to back,
+# so they share one alternation and a single subn() pass.
 # -------------------------------------------------
 
-_ACCOUNT_NAME_EQ_RE = re.compile(
+_FUZZY_NAME_COLUMNS = (
+    "warehouse_name",
+    "name",          # quick_code_master.name (city / region)
+    "region_name",   # future-proofing
+)
+
+# Longest-first, so no column is shadowed by a shorter alternative
+_FUZZY_NAME_ALT = "|".join(sorted(_FUZZY_NAME_COLUMNS, key=len, reverse=True))
+
+_NAME_EQ_RE = re.compile(
     rf"""
     (?:
         (?P<qualified>{IDENT}\.account_name)
         |
         (?P<unqualified>\baccount_name\b)
+        |
+        (?P<col>{IDENT}\.(?:{_FUZZY_NAME_ALT})\b)
     )
     \s*=\s*
     '(?P<val>[^']+)'
@@ -116,55 +140,36 @@ _ACCOUNT_NAME_EQ_RE = re.compile(
 )
 
 
-def _enforce_account_name_like(sql: str) -> str:
+def _enforce_name_like(sql: str) -> str:
+    # Every column covered here (account_name, *_name, name) contains "name"
+    if "=" not in sql or "name" not in sql.lower():
+        return sql
+
+    counts = {"account": 0, "fuzzy": 0}
+
     def repl(match: re.Match) -> str:
-        col = match.group("qualified") or "account_name"
         val = match.group("val")
+        fuzzy_col = match.group("col")
+        if fuzzy_col:
+            counts["fuzzy"] += 1
+            return f"{fuzzy_col} LIKE '%%{val}%%'"
+
+        counts["account"] += 1
+        col = match.group("qualified") or "account_name"
         return f"{col} LIKE '%%{val}%%'"
 
-    sql, count = _ACCOUNT_NAME_EQ_RE.subn(repl, sql)
+    sql = _NAME_EQ_RE.sub(repl, sql)
 
-    if count:
+    if counts["account"]:
         logger.info(
             "SQL Refiner: enforced LIKE for account_name (%d occurrence(s))",
-            count,
+            counts["account"],
         )
 
-    return sql
-
-
-# -------------------------------------------------
-# Rule 3 — HARD invariant: region / city / warehouse fuzzy
-# -------------------------------------------------
-
-_FUZZY_NAME_COLUMNS = {
-    "warehouse_name",
-    "name",          # quick_code_master.name (city / region)
-    "region_name",   # future-proofing
-}
-
-_OTHER_NAME_EQ_RE = re.compile(
-    rf"""
-    (?P<col>{IDENT}\.(?:{'|'.join(_FUZZY_NAME_COLUMNS)}))
-    \s*=\s*
-    '(?P<val>[^']+)'
-    """,
-    flags=re.IGNORECASE | re.VERBOSE,
-)
-
-
-def _apply_fuzzy_name_like(sql: str) -> str:
-    def repl(match: re.Match) -> str:
-        col = match.group("col")
-        val = match.group("val")
-        return f"{col} LIKE '%%{val}%%'"
-
-    sql, count = _OTHER_NAME_EQ_RE.subn(repl, sql)
-
-    if count:
+    if counts["fuzzy"]:
         logger.info(
             "SQL Refiner: enforced LIKE for business name (%d occurrence(s))",
-            count,
+            counts["fuzzy"],
         )
 
     return sql
@@ -183,8 +188,7 @@ def refine_sql(sql: str) -> str:
 
     sql = _fix_hyphenated_schema_names(sql)  # 🔒 MUST BE FIRST
     sql = _fix_quick_code_joins(sql)
-    sql = _enforce_account_name_like(sql)
-    sql = _apply_fuzzy_name_like(sql)
+    sql = _enforce_name_like(sql)            # account_name + fuzzy names
 
     if sql != original:
         logger.debug("SQL Refiner modified SQL")
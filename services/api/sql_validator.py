@@ -7,14 +7,92 @@ FIXED: Backtick validation now works correctly
 """
 
 import re
-from typing import List, Dict
+from typing import List, Dict, Set
 from dataclasses import dataclass
+from functools import lru_cache
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 _TABLE_REF_RE = re.compile(
     r"`([^`]+)`\.`([^`]+)`",  # matches `schema`.`table`
     re.IGNORECASE
 )
 
+# SQL-side regex rules (compiled once at import)
+_ALIAS_RE = re.compile(r'\bAS\s+([a-zA-Z0-9]+)\s+([a-zA-Z0-9]+)\b', re.IGNORECASE)
+_NOW_RE = re.compile(r'\bNOW\s*\(\)', re.IGNORECASE)
+_APPROVAL_STATUS_NUM_RE = re.compile(r'approval_status\s*=\s*\d+', re.IGNORECASE)
+_NEQ_RE = re.compile(r'<>\s*\d+')
+_SCHEMA_REF_RE = re.compile(r'`?([a-z]+-[a-z]+-[a-z]+)\.([a-z_]+)`?', re.IGNORECASE)
+_CASE_WHEN_RE = re.compile(r'CASE\s+WHEN', re.IGNORECASE)
+_END_RE = re.compile(r'END', re.IGNORECASE)
+
+# Rules matched together in one pass by _SQL_RULES_RE.
+# Each rule is wrapped in a zero-width lookahead so overlapping rules
+# never consume each other's text; m.lastgroup names the rule that fired.
+_SQL_RULE_RES = {
+    "alias_with_space": _ALIAS_RE,
+    "now_call": _NOW_RE,
+    "numeric_status": _APPROVAL_STATUS_NUM_RE,
+    "neq_number": _NEQ_RE,
+    "hyphen_schema": _SCHEMA_REF_RE,
+}
+
+_SQL_RULES_RE = re.compile(
+    "|".join(f"(?=(?P<{name}>{rx.pattern}))" for name, rx in _SQL_RULE_RES.items()),
+    re.IGNORECASE
+)
+
+
+class _KeywordScanner:
+    """
+    Finds every keyword that occurs as a substring of a text, in one pass.
+    The result equals {kw for kw in keywords if kw in text}.
+
+    Uses a pyahocorasick automaton when available. Otherwise keywords are
+    tried longest-first inside a zero-width lookahead, so each offset
+    reports its longest hit; shorter keywords that are prefixes of that
+    hit are added from a precomputed table.
+    """
+
+    def __init__(self, keywords):
+        kws = sorted(set(keywords), key=len, reverse=True)
+
+        self._ac = None
+        if ahocorasick is not None:
+            self._ac = ahocorasick.Automaton()
+            for kw in kws:
+                self._ac.add_word(kw, kw)
+            self._ac.make_automaton()
+            return
+
+        self._re = re.compile("(?=(" + "|".join(map(re.escape, kws)) + "))")
+        self._prefixes = {
+            kw: frozenset(p for p in kws if kw.startswith(p))
+            for kw in kws
+        }
+
+    def hits(self, text: str) -> Set[str]:
+        if self._ac is not None:
+            return {kw for _, kw in self._ac.iter(text)}
+
+        found = set()
+        for m in self._re.finditer(text):
+            found |= self._prefixes[m.group(1)]
+        return found
+
+
+@dataclass
+class _ValidationContext:
+    """Per-call inputs shared by every check, computed once in validate()."""
+    sql: str
+    sql_markers: Set[str]
+    q_hits: Set[str]
+    rule_hits: Dict[str, int]
+
 
 @dataclass
 class Violation:
@@ -24,6 +102,41 @@ class Violation:
     fix_hint: str
 
 
+def _has_case_ratio(sql: str) -> bool:
+    """
+    True if a CASE WHEN ... END is divided by a later CASE WHEN ... END.
+    Same result as searching 'CASE\\s+WHEN.*?END.*?/.*?CASE\\s+WHEN.*?END'
+    with DOTALL, but every step is a forward scan from the earliest
+    candidate, so there is no backtracking across the nested '.*?'.
+    """
+    first = _CASE_WHEN_RE.search(sql)
+    if not first:
+        return False
+    end = _END_RE.search(sql, first.end())
+    if not end:
+        return False
+    slash = sql.find('/', end.end())
+    if slash < 0:
+        return False
+    second = _CASE_WHEN_RE.search(sql, slash + 1)
+    return second is not None and _END_RE.search(sql, second.end()) is not None
+
+
+@lru_cache(maxsize=256)
+def _render_retry_text(items: tuple) -> str:
+    """Render retry feedback for (rule, description, fix_hint) tuples."""
+    parts = [
+        "\n\n=== CRITICAL: YOUR PREVIOUS ATTEMPT HAD ERRORS ===\n",
+        "You MUST fix these violations:\n\n",
+    ]
+    parts.extend(
+        f"{i}. {description}\n   FIX: {fix_hint}\n\n"
+        for i, (_, description, fix_hint) in enumerate(items, 1)
+    )
+    parts.append("Generate the corrected SQL now:\n")
+    return "".join(parts)
+
+
 class SQLValidator:
     """
     Validates generated SQL against semantic rules.
@@ -33,6 +146,9 @@ class SQLValidator:
     def __init__(self, schema_json: dict | None = None):
         self.schema_json = schema_json or {}
         self.table_schema_map = _build_table_schema_map(self.schema_json)
+        self._schema_by_table_lower = {
+            t: s.lower() for t, s in self.table_schema_map.items()
+        }
 
 
 
@@ -51,6 +167,19 @@ class SQLValidator:
             'filter_logic': "user_type LIKE '%EMPLOYEE%'"
         }
     }
+
+    # Question keyword groups (matched as substrings of the lowered question)
+    VENDOR_TERMS = ('vendor', 'supplier', 'payee')
+    APPROVAL_TIME_TERMS = ('approval time', 'approval duration', 'time to approve', 'approval period', 'tat', 'turnaround')
+    STATUS_TERMS = ('approved', 'rejected', 'pending', 'commented', 'status')
+    REGION_TERMS = ('region', 'south', 'north', 'east', 'west', 'zone')
+    RATIO_TERMS = ('ratio', 'rate', 'percentage', 'rejection to approval')
+    FINANCIAL_TERMS = ('spend', 'amount', 'cost', 'total', 'bill', 'expense')
+    LINE_ITEM_TERMS = ('expense', 'category', 'line item', 'item')
+    EXPENSE_CATEGORY_TERMS = (
+        'rent', 'manpower', 'security', 'electricity', 'diesel',
+        'transport', 'mhe', 'insurance', 'tyre', 'fuel'
+    )
     
     def validate(self, sql: str, question: str) -> List[Violation]:
         """
@@ -65,40 +194,42 @@ class SQLValidator:
         """
         violations = []
         
-        # Run all validation checks
-        violations.extend(self._check_alias_syntax(sql))
-        violations.extend(self._check_user_role_safety(sql, question))
-        violations.extend(self._check_approval_time(sql, question))
-        violations.extend(self._check_status_resolution(sql, question))
-        violations.extend(self._check_region_resolution(sql, question))
-        violations.extend(self._check_ratio_denominator(sql, question))
-        violations.extend(self._check_schema_names(sql))
-        violations.extend(self._check_master_status_join_integrity(sql))
-        violations.extend(self._check_vendor_source(sql, question))
-        violations.extend(self._check_spend_aggregation(sql, question))
-        violations.extend(self._check_expense_category_resolution(sql,question))
-        violations.extend(self._check_schema_integrity(sql))
-        violations.extend(self._check_warehouse_source(sql))
-        violations.extend(self._check_ambiguous_columns(sql))
-
-
-
+        # Lower-case once, scan once; every check reads from ctx
+        ctx = _ValidationContext(
+            sql=sql,
+            sql_markers=_SQL_SCANNER.hits(sql.lower()),
+            q_hits=_QUESTION_SCANNER.hits(question.lower()),
+            rule_hits=self._scan_sql_rules(sql),
+        )
+        
+        # Run only the checks whose trigger markers are present
+        markers = ctx.sql_markers | ctx.q_hits | set(ctx.rule_hits)
+        for triggers, check in self._CHECKS:
+            if triggers is None or not triggers.isdisjoint(markers):
+                violations.extend(check(self, ctx))
         
         return violations
     
-    def _check_user_role_safety(self, sql: str, question: str) -> List[Violation]:
+    @staticmethod
+    def _scan_sql_rules(sql: str) -> Dict[str, int]:
+        """Map each SQL rule that fires to the offset of its first match."""
+        hits = {}
+        for m in _SQL_RULES_RE.finditer(sql):
+            hits.setdefault(m.lastgroup, m.start())
+        return hits
+    
+    def _check_user_role_safety(self, ctx: _ValidationContext) -> List[Violation]:
         """Ensures that if a role is asked for, the user_type is filtered."""
         violations = []
-        sql_lower = sql.lower()
-        q_lower = question.lower()
+        markers = ctx.sql_markers
         
         # Check if using user table
-        uses_user_table = ('ems-auth-service' in sql_lower and 'user' in sql_lower)
+        uses_user_table = ('ems-auth-service' in markers and 'user' in markers)
         
         if not uses_user_table:
             # Error if asking for role but NOT using user table
             for role, config in self.ROLE_DEFINITIONS.items():
-                if any(kw in q_lower for kw in config['keywords']):
+                if not ctx.q_hits.isdisjoint(config['keywords']):
                     violations.append(Violation(
                         rule="WRONG_TABLE_FOR_ROLE",
                         description=f"Queries for {role} must join `ems-auth-service`.`user`.",
@@ -108,14 +239,14 @@ class SQLValidator:
 
         # Error if using user table but NOT filtering correctly
         for role, config in self.ROLE_DEFINITIONS.items():
-            if any(kw in q_lower for kw in config['keywords']):
-                if 'user_type' not in sql_lower:
+            if not ctx.q_hits.isdisjoint(config['keywords']):
+                if 'user_type' not in markers:
                      violations.append(Violation(
                         rule=f"MISSING_{role.upper()}_FILTER",
                         description=f"You queried Users for '{role}' but forgot the type filter.",
                         fix_hint=f"Add condition: AND {config['filter_logic']}"
                     ))
-                elif role not in sql_lower: 
+                elif role not in markers: 
                      violations.append(Violation(
                         rule=f"WRONG_TYPE_VALUE",
                         description=f"Filter seems to miss the specific '{role}' value.",
@@ -124,63 +255,62 @@ class SQLValidator:
         return violations
 
 
-    def _check_schema_integrity(self, sql: str) -> list[Violation]:
+    def _check_schema_integrity(self, ctx: _ValidationContext) -> list[Violation]:
         """
         Ensure every `schema`.`table` reference matches MDL definition.
         """
         violations = []
+        expected_by_table = self._schema_by_table_lower
 
-        for schema, table in _TABLE_REF_RE.findall(sql):
+        for schema, table in _TABLE_REF_RE.findall(ctx.sql):
             table_l = table.lower()
-            schema_l = schema.lower()
 
             # Table not in MDL → ignore here (other validators may handle)
-            if table_l not in self.table_schema_map:
+            expected_l = expected_by_table.get(table_l)
+            if expected_l is None or schema.lower() == expected_l:
                 continue
 
             expected_schema = self.table_schema_map[table_l]
-
-            if schema_l != expected_schema.lower():
-                violations.append(Violation(
-                    rule="WRONG_SCHEMA",
-                    description=(
-                        f"Table `{table}` is referenced from schema `{schema}`, "
-                        f"but MDL defines it under `{expected_schema}`"
-                    ),
-                    fix_hint=(
-                        f"Use `{expected_schema}`.`{table}` instead of `{schema}`.`{table}`"
-                    )
-                ))
+            violations.append(Violation(
+                rule="WRONG_SCHEMA",
+                description=(
+                    f"Table `{table}` is referenced from schema `{schema}`, "
+                    f"but MDL defines it under `{expected_schema}`"
+                ),
+                fix_hint=(
+                    f"Use `{expected_schema}`.`{table}` instead of `{schema}`.`{table}`"
+                )
+            ))
 
         return violations
 
 
 
-    def _check_alias_syntax(self, sql: str) -> List[Violation]:
+    def _check_alias_syntax(self, ctx: _ValidationContext) -> List[Violation]:
         """Check for invalid aliases with spaces (e.g. AS Vendor Name)"""
         violations = []
-        pattern = r'\bAS\s+([a-zA-Z0-9]+)\s+([a-zA-Z0-9]+)\b'
-        matches = re.finditer(pattern, sql, re.IGNORECASE)
-        for match in matches:
-            bad_alias = f"{match.group(1)} {match.group(2)}"
-            violations.append(Violation(
-                rule="INVALID_ALIAS_SYNTAX",
-                description=f"Aliases cannot contain spaces: '{bad_alias}'",
-                fix_hint="Use snake_case (e.g., 'vendor_name') or remove spaces."
-            ))
-            break 
+        if "alias_with_space" not in ctx.rule_hits:
+            return violations
+        
+        # Only report the first offending alias
+        match = _ALIAS_RE.match(ctx.sql, ctx.rule_hits["alias_with_space"])
+        bad_alias = f"{match.group(1)} {match.group(2)}"
+        violations.append(Violation(
+            rule="INVALID_ALIAS_SYNTAX",
+            description=f"Aliases cannot contain spaces: '{bad_alias}'",
+            fix_hint="Use snake_case (e.g., 'vendor_name') or remove spaces."
+        ))
         return violations
 
-    def _check_vendor_source(self, sql: str, question: str) -> List[Violation]:
+    def _check_vendor_source(self, ctx: _ValidationContext) -> List[Violation]:
         """Enforce Vendor = User table rule."""
         violations = []
-        q_lower = question.lower()
-        sql_lower = sql.lower()
+        markers = ctx.sql_markers
         
         # If asking about Vendor...
-        if any(kw in q_lower for kw in ['vendor', 'supplier', 'payee']):
+        if not ctx.q_hits.isdisjoint(self.VENDOR_TERMS):
             # ...MUST join user table
-            if 'ems-auth-service' not in sql_lower or 'user' not in sql_lower:
+            if 'ems-auth-service' not in markers or 'user' not in markers:
                 violations.append(Violation(
                     rule="WRONG_VENDOR_SOURCE",
                     description="Vendors must be queried from `ems-auth-service`.`user`",
@@ -188,7 +318,7 @@ class SQLValidator:
                 ))
             
             # ...MUST NOT join quick_code_master for vendor names
-            if 'quick_code_master' in sql_lower and 'vendor_name' in sql_lower:
+            if 'quick_code_master' in markers and 'vendor_name' in markers:
                  violations.append(Violation(
                     rule="VENDOR_IS_NOT_QUICK_CODE",
                     description="Vendors are NOT Quick Codes.",
@@ -196,18 +326,16 @@ class SQLValidator:
                 ))
         return violations
 
-    def _check_spend_aggregation(self, sql: str, question: str) -> List[Violation]:
+    def _check_spend_aggregation(self, ctx: _ValidationContext) -> List[Violation]:
         """Enforce Spend = invoice_info.total_amount rule."""
         violations = []
-        q_lower = question.lower()
-        sql_lower = sql.lower()
+        markers = ctx.sql_markers
         
-        financial_terms = ['spend', 'amount', 'cost', 'total', 'bill', 'expense']
-        if any(kw in q_lower for kw in financial_terms):
+        if not ctx.q_hits.isdisjoint(self.FINANCIAL_TERMS):
             
             # Detect use of line_items for aggregation
-            if 'invoice_line_items' in sql_lower:
-                if not any(k in q_lower for k in ['expense', 'category', 'line item', 'item']):
+            if 'invoice_line_items' in markers:
+                if ctx.q_hits.isdisjoint(self.LINE_ITEM_TERMS):
                     violations.append(Violation(
                         rule="WRONG_SPEND_SOURCE",
                         description="Warehouse/account spend must be aggregated directly from invoice_info without line items",
@@ -217,21 +345,18 @@ class SQLValidator:
                 
         return violations
 
-    def _check_approval_time(self, sql: str, question: str) -> List[Violation]:
+    def _check_approval_time(self, ctx: _ValidationContext) -> List[Violation]:
         """Validate approval time calculation rules."""
         violations = []
         
         # Check if this is an approval time query
-        is_approval_query = any(
-            term in question.lower()
-            for term in ['approval time', 'approval duration', 'time to approve', 'approval period', 'tat', 'turnaround']
-        )
+        is_approval_query = not ctx.q_hits.isdisjoint(self.APPROVAL_TIME_TERMS)
         
         if not is_approval_query:
             return violations
         
         # Check for NOW() usage (forbidden)
-        if re.search(r'\bNOW\s*\(\)', sql, re.IGNORECASE):
+        if "now_call" in ctx.rule_hits:
             violations.append(Violation(
                 rule="APPROVAL_TIME_NOW_FORBIDDEN",
                 description="NOW() must not be used in approval time calculations",
@@ -239,7 +364,7 @@ class SQLValidator:
             ))
         
         # Check for updated_at presence (required)
-        if 'updated_at' not in sql.lower():
+        if 'updated_at' not in ctx.sql_markers:
             violations.append(Violation(
                 rule="APPROVAL_TIME_MISSING_UPDATED_AT",
                 description="Approval time requires updated_at column",
@@ -247,7 +372,7 @@ class SQLValidator:
             ))
         
         # Check for master_status join (required for status filtering)
-        if 'master_status' not in sql.lower():
+        if 'master_status' not in ctx.sql_markers:
             violations.append(Violation(
                 rule="APPROVAL_TIME_MISSING_STATUS_JOIN",
                 description="Approval queries must join master_status table",
@@ -256,21 +381,18 @@ class SQLValidator:
         
         return violations
     
-    def _check_status_resolution(self, sql: str, question: str) -> List[Violation]:
+    def _check_status_resolution(self, ctx: _ValidationContext) -> List[Violation]:
         """Validate status filtering rules."""
         violations = []
         
         # Check if query involves status filtering
-        has_status = any(
-            term in question.lower()
-            for term in ['approved', 'rejected', 'pending', 'commented', 'status']
-        )
+        has_status = not ctx.q_hits.isdisjoint(self.STATUS_TERMS)
         
         if not has_status:
             return violations
         
         # Check for numeric approval_status (forbidden)
-        if re.search(r'approval_status\s*=\s*\d+', sql, re.IGNORECASE):
+        if "numeric_status" in ctx.rule_hits:
             violations.append(Violation(
                 rule="STATUS_NUMERIC_FORBIDDEN",
                 description="Numeric approval_status values are forbidden",
@@ -278,7 +400,7 @@ class SQLValidator:
             ))
         
         # Check for master_status join if not present
-        if 'approval_status' in sql.lower() and 'master_status' not in sql.lower():
+        if 'approval_status' in ctx.sql_markers and 'master_status' not in ctx.sql_markers:
             violations.append(Violation(
                 rule="STATUS_MISSING_MASTER_STATUS_JOIN",
                 description="Status filtering requires master_status join",
@@ -286,7 +408,7 @@ class SQLValidator:
             ))
         
         # Check for LIKE-based matching (preferred)
-        if 'master_status' in sql.lower() and 'LIKE' not in sql.upper():
+        if 'master_status' in ctx.sql_markers and 'like' not in ctx.sql_markers:
             violations.append(Violation(
                 rule="STATUS_EXACT_MATCH_DISCOURAGED",
                 description="Status matching should use LIKE for fuzzy matching",
@@ -295,23 +417,20 @@ class SQLValidator:
         
         return violations
     
-    def _check_region_resolution(self, sql: str, question: str) -> List[Violation]:
+    def _check_region_resolution(self, ctx: _ValidationContext) -> List[Violation]:
         """Validate region/geography resolution rules."""
         violations = []
         
         # Check if query involves region
-        has_region = any(
-            term in question.lower()
-            for term in ['region', 'south', 'north', 'east', 'west', 'zone']
-        )
+        has_region = not ctx.q_hits.isdisjoint(self.REGION_TERMS)
         
         if not has_region:
             return violations
         
         # Check if using account geography instead of warehouse (common error)
-        if 'account_info' in sql.lower() and 'warehouse_info' not in sql.lower():
+        if 'account_info' in ctx.sql_markers and 'warehouse_info' not in ctx.sql_markers:
             # Check if trying to get region from account
-            if any(field in sql.lower() for field in ['state_id', 'city_id', 'zone_id']):
+            if any(field in ctx.sql_markers for field in ['state_id', 'city_id', 'zone_id']):
                 violations.append(Violation(
                     rule="REGION_FROM_ACCOUNT_INVALID",
                     description="Region must come from warehouse, not account",
@@ -320,25 +439,21 @@ class SQLValidator:
         
         return violations
     
-    def _check_ratio_denominator(self, sql: str, question: str) -> List[Violation]:
+    def _check_ratio_denominator(self, ctx: _ValidationContext) -> List[Violation]:
         """Validate ratio/percentage calculation rules."""
         violations = []
         
         # Check if query involves ratios
-        has_ratio = any(
-            term in question.lower()
-            for term in ['ratio', 'rate', 'percentage', 'rejection to approval']
-        )
+        has_ratio = not ctx.q_hits.isdisjoint(self.RATIO_TERMS)
         
         if not has_ratio:
             return violations
         
         # Look for division in CASE statements
         # Common error: filtering denominator
-        case_pattern = r'CASE\s+WHEN.*?END.*?/.*?CASE\s+WHEN.*?END'
-        if re.search(case_pattern, sql, re.IGNORECASE | re.DOTALL):
+        if _has_case_ratio(ctx.sql):
             # Check if denominator uses <> (wrong pattern)
-            if re.search(r'<>\s*\d+', sql):
+            if "neq_number" in ctx.rule_hits:
                 violations.append(Violation(
                     rule="RATIO_DENOMINATOR_FILTERED",
                     description="Ratio denominator should not be filtered by same condition",
@@ -347,17 +462,18 @@ class SQLValidator:
         
         return violations
     
-    def _check_schema_names(self, sql: str) -> List[Violation]:
+    def _check_schema_names(self, ctx: _ValidationContext) -> List[Violation]:
         """
         Validate schema naming conventions.
         FIXED: Properly detects backticks around schema names.
         """
         violations = []
+        if "hyphen_schema" not in ctx.rule_hits:
+            return violations
         
         # Find all schema references (with or without backticks)
         # Pattern: word-word-word.word (schema-with-hyphens.table)
-        schema_pattern = r'`?([a-z]+-[a-z]+-[a-z]+)\.([a-z_]+)`?'
-        matches = re.finditer(schema_pattern, sql, re.IGNORECASE)
+        matches = _SCHEMA_REF_RE.finditer(ctx.sql)
         
         found_unbackticked = False
         
@@ -402,16 +518,9 @@ class SQLValidator:
         if not violations:
             return ""
         
-        retry_text = "\n\n=== CRITICAL: YOUR PREVIOUS ATTEMPT HAD ERRORS ===\n"
-        retry_text += "You MUST fix these violations:\n\n"
-        
-        for i, v in enumerate(violations, 1):
-            retry_text += f"{i}. {v.description}\n"
-            retry_text += f"   FIX: {v.fix_hint}\n\n"
-        
-        retry_text += "Generate the corrected SQL now:\n"
-        
-        return retry_text
+        return _render_retry_text(
+            tuple((v.rule, v.description, v.fix_hint) for v in violations)
+        )
     
     def get_validation_summary(self, violations: List[Violation]) -> Dict:
         """
@@ -432,13 +541,13 @@ class SQLValidator:
             ]
         }
     
-    def _check_master_status_join_integrity(self, sql: str) -> List[Violation]:
+    def _check_master_status_join_integrity(self, ctx: _ValidationContext) -> List[Violation]:
         violations = []
 
-        sql_lower = sql.lower()
+        markers = ctx.sql_markers
 
-        references_status_name = "master_status.name" in sql_lower
-        has_join = "join" in sql_lower and "master_status" in sql_lower
+        references_status_name = "master_status.name" in markers
+        has_join = "join" in markers and "master_status" in markers
 
         if references_status_name and not has_join:
             violations.append(Violation(
@@ -452,27 +561,21 @@ class SQLValidator:
 
         return violations
     
-    def _check_expense_category_resolution(self, sql: str, question: str) -> list[Violation]:
+    def _check_expense_category_resolution(self, ctx: _ValidationContext) -> list[Violation]:
         violations = []
-        q = question.lower()
-        sql_lower = sql.lower()
-
-        expense_keywords = [
-            'rent', 'manpower', 'security', 'electricity', 'diesel',
-            'transport', 'mhe', 'insurance', 'tyre', 'fuel'
-        ]
+        markers = ctx.sql_markers
 
-        if not any(k in q for k in expense_keywords):
+        if ctx.q_hits.isdisjoint(self.EXPENSE_CATEGORY_TERMS):
             return violations
 
-        if 'expenses_master' not in sql_lower:
+        if 'expenses_master' not in markers:
             violations.append(Violation(
                 rule="EXPENSE_MASTER_MISSING",
                 description="Expense category queries must resolve via expenses_master",
                 fix_hint="Join invoice_info → invoice_line_items → expenses_master and filter on expenses_master.expense_name"
             ))
 
-        if 'invoice_line_items' not in sql_lower:
+        if 'invoice_line_items' not in markers:
             violations.append(Violation(
                 rule="LINE_ITEMS_MISSING_FOR_EXPENSE",
                 description="Expense category filtering requires invoice_line_items join",
@@ -481,13 +584,13 @@ class SQLValidator:
 
         return violations
     
-    def _check_warehouse_source(self, sql: str) -> list[Violation]:
+    def _check_warehouse_source(self, ctx: _ValidationContext) -> list[Violation]:
         violations = []
-        sql_lower = sql.lower()
+        markers = ctx.sql_markers
 
-        if 'warehouse' in sql_lower:
+        if 'warehouse' in markers:
             # Disallow fake warehouse tables
-            if '`ems-portal-service`.`warehouse`' in sql_lower or 'warehouse ' in sql_lower:
+            if '`ems-portal-service`.`warehouse`' in markers or 'warehouse ' in markers:
                 violations.append(Violation(
                     rule="WRONG_WAREHOUSE_TABLE",
                     description="Warehouse data must be queried from ems-warehouse-service.warehouse_info",
@@ -497,12 +600,12 @@ class SQLValidator:
         return violations
     
 
-    def _check_ambiguous_columns(self, sql: str) -> list[Violation]:
+    def _check_ambiguous_columns(self, ctx: _ValidationContext) -> list[Violation]:
         violations = []
-        sql_lower = sql.lower()
+        markers = ctx.sql_markers
 
         # If SUM(total_amount) is used without qualification
-        if 'sum(total_amount)' in sql_lower:
+        if 'sum(total_amount)' in markers:
             violations.append(Violation(
                 rule="AMBIGUOUS_COLUMN",
                 description="total_amount must be fully qualified as invoice_info.total_amount",
@@ -511,6 +614,28 @@ class SQLValidator:
 
         return violations
 
+    # Dispatch table for validate(), in reporting order.
+    # Triggers are question keywords, SQL sentinels or SQL rule names; a
+    # check can only report something if one of them is present, so it is
+    # skipped otherwise. None means the check always runs.
+    _CHECKS = [
+        (frozenset({"alias_with_space"}), _check_alias_syntax),
+        (frozenset(kw for config in ROLE_DEFINITIONS.values() for kw in config['keywords']),
+         _check_user_role_safety),
+        (frozenset(APPROVAL_TIME_TERMS), _check_approval_time),
+        (frozenset(STATUS_TERMS), _check_status_resolution),
+        (frozenset(REGION_TERMS), _check_region_resolution),
+        (frozenset(RATIO_TERMS), _check_ratio_denominator),
+        (frozenset({"hyphen_schema"}), _check_schema_names),
+        (frozenset({"master_status.name"}), _check_master_status_join_integrity),
+        (frozenset(VENDOR_TERMS), _check_vendor_source),
+        (frozenset(FINANCIAL_TERMS), _check_spend_aggregation),
+        (frozenset(EXPENSE_CATEGORY_TERMS), _check_expense_category_resolution),
+        (None, _check_schema_integrity),
+        (frozenset({"warehouse"}), _check_warehouse_source),
+        (frozenset({"sum(total_amount)"}), _check_ambiguous_columns),
+    ]
+
 
 
 
@@ -524,8 +649,7 @@ def validate_sql(sql: str, question: str) -> tuple[bool, List[Violation]]:
     Returns:
         (is_valid, violations) tuple
     """
-    validator = SQLValidator()
-    violations = validator.validate(sql, question)
+    violations = VALIDATOR.validate(sql, question)
     return len(violations) == 0, violations
 
 
@@ -543,3 +667,32 @@ def _build_table_schema_map(schema_json: dict) -> dict[str, str]:
             mapping[table.lower()] = schema
     return mapping
 
+
+# Every question keyword any check looks for, scanned once per validate()
+_QUESTION_SCANNER = _KeywordScanner(
+    [kw for config in SQLValidator.ROLE_DEFINITIONS.values() for kw in config['keywords']]
+    + list(SQLValidator.VENDOR_TERMS)
+    + list(SQLValidator.APPROVAL_TIME_TERMS)
+    + list(SQLValidator.STATUS_TERMS)
+    + list(SQLValidator.REGION_TERMS)
+    + list(SQLValidator.RATIO_TERMS)
+    + list(SQLValidator.FINANCIAL_TERMS)
+    + list(SQLValidator.LINE_ITEM_TERMS)
+    + list(SQLValidator.EXPENSE_CATEGORY_TERMS)
+)
+
+# Every SQL substring any check looks for, scanned once per validate()
+_SQL_SENTINELS = tuple(SQLValidator.ROLE_DEFINITIONS) + (
+    'ems-auth-service', 'user', 'user_type',
+    'quick_code_master', 'vendor_name',
+    'invoice_line_items', 'expenses_master', 'sum(total_amount)',
+    'master_status', 'master_status.name', 'approval_status', 'updated_at',
+    'join', 'like',
+    'account_info', 'state_id', 'city_id', 'zone_id',
+    'warehouse', 'warehouse ', 'warehouse_info', '`ems-portal-service`.`warehouse`',
+)
+
+_SQL_SCANNER = _KeywordScanner(_SQL_SENTINELS)
+
+# Shared schema-less validator; validate() keeps no per-call state
+VALIDATOR = SQLValidator()
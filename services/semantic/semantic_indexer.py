@@ -1,22 +1,87 @@
 from pathlib import Path
+import hashlib
 import faiss
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
 SEMANTIC_PATH = Path("data/semantic/business_semantic.md")
+EMBED_CACHE_PATH = Path("data/semantic/embed_cache.npz")
 OLLAMA_URL = "http://localhost:11434"
 EMBED_MODEL = "nomic-embed-text"
 
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 64
+EMBED_BATCH_SIZE = 64
 
-def embed(text: str) -> list[float]:
-    resp = requests.post(
-        f"{OLLAMA_URL}/api/embeddings",
-        json={"model": EMBED_MODEL, "prompt": text},
-        timeout=30,
+# Keep-alive session for Ollama calls
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_maxsize=16))
+
+
+def embed_batch(texts: list[str]) -> list[list[float]]:
+    """Embed many texts in one request via Ollama's batched /api/embed."""
+    resp = _SESSION.post(
+        f"{OLLAMA_URL}/api/embed",
+        json={"model": EMBED_MODEL, "input": texts},
+        timeout=30 + len(texts),
     )
     resp.raise_for_status()
-    return resp.json()["embedding"]
+    return resp.json()["embeddings"]
+
+
+def embed_all(texts: list[str]) -> np.ndarray:
+    """
+    Embed texts batch by batch into one preallocated float32 matrix,
+    so only a single batch of JSON floats is alive at a time.
+    """
+    out = None
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = np.asarray(
+            embed_batch(texts[start:start + EMBED_BATCH_SIZE]),
+            dtype=np.float32,
+        )
+        if out is None:
+            out = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+        out[start:start + len(batch)] = batch
+    return out
+
+
+def _chunk_key(text: str) -> str:
+    return hashlib.sha1(f"{EMBED_MODEL}:{text}".encode()).hexdigest()
+
+
+def _load_embed_cache() -> dict[str, np.ndarray]:
+    if not EMBED_CACHE_PATH.exists():
+        return {}
+    try:
+        with np.load(EMBED_CACHE_PATH) as data:
+            return {key: data[key] for key in data.files}
+    except Exception:
+        return {}
+
+
+def embed_cached(texts: list[str]) -> np.ndarray:
+    """
+    Embed texts through a content-addressed cache (sha1 of model + text),
+    so a rebuild only calls Ollama for chunks that changed.
+    """
+    cache = _load_embed_cache()
+    keys = [_chunk_key(t) for t in texts]
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+
+    if missing:
+        fresh = embed_all([texts[i] for i in missing])
+        for row, i in enumerate(missing):
+            cache[keys[i]] = fresh[row]
+
+    # Rewrite with only the current chunks so stale vectors don't pile up
+    if missing or len(cache) != len(set(keys)):
+        EMBED_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(EMBED_CACHE_PATH, **{key: cache[key] for key in keys})
+
+    return np.stack([cache[key] for key in keys]).astype(np.float32, copy=False)
 
 
 def chunk_semantics(text: str) -> list[str]:
@@ -39,11 +104,19 @@ def build_index():
     text = SEMANTIC_PATH.read_text()
     chunks = chunk_semantics(text)
 
-    embeddings = [embed(c) for c in chunks]
-    dim = len(embeddings[0])
+    embeddings = embed_cached(chunks)
+    dim = embeddings.shape[1]
 
-    index = faiss.IndexFlatL2(dim)
-    index.add(np.array(embeddings).astype("float32"))
+    # Unit vectors + inner product = cosine similarity, searched via HNSW graph.
+    # Vectors are stored as 8-bit scalar codes (4x smaller than float32);
+    # the quantizer learns per-dimension ranges in train().
+    faiss.normalize_L2(embeddings)
+    index = faiss.IndexHNSWSQ(
+        dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+    )
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.train(embeddings)
+    index.add(embeddings)
 
     return index, chunks
 
@@ -1,26 +1,55 @@
+import functools
+from pathlib import Path
 import faiss
 import json
 import numpy as np
 import requests
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 OLLAMA_URL = "http://localhost:11434"
 EMBED_MODEL = "nomic-embed-text"
 
-index = faiss.read_index("semantic.index")
-chunks = json.loads(open("semantic_chunks.json").read())
+HNSW_EF_SEARCH = 32
+
+
+# Loaded on first use and shared afterwards, so importing this module
+# does no IO and doesn't fail when the index hasn't been built yet
+@functools.lru_cache(maxsize=1)
+def _index():
+    index = faiss.read_index("semantic.index")
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    return index
+
+
+@functools.lru_cache(maxsize=1)
+def _chunks() -> list[str]:
+    return _json_loads(Path("semantic_chunks.json").read_bytes())
 
 
-def embed(text: str) -> list[float]:
+@functools.lru_cache(maxsize=1024)
+def embed(text: str) -> tuple[float, ...]:
+    # Cached per query string; tuple keeps the cached value immutable
     resp = requests.post(
         f"{OLLAMA_URL}/api/embeddings",
         json={"model": EMBED_MODEL, "prompt": text},
         timeout=15,
     )
     resp.raise_for_status()
-    return resp.json()["embedding"]
+    return tuple(resp.json()["embedding"])
 
 
 def retrieve_relevant_semantics(query: str, k: int = 3) -> list[str]:
+    index = _index()
+    chunks = _chunks()
     vec = np.array([embed(query)]).astype("float32")
+    # Cosine indexes store unit vectors; older flat L2 indexes do not
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        faiss.normalize_L2(vec)
     _, idxs = index.search(vec, k)
     return [chunks[i] for i in idxs[0]]
@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+
+@pytest.fixture(scope="session")
+def sqlite_engine():
+    """
+    One in-memory SQLite database for the whole session.
+    StaticPool keeps a single connection, so every user sees the same data.
+    """
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE demo (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO demo (name) VALUES ('alice'), ('bob')"))
+    yield engine
+    engine.dispose()
@@ -5,17 +5,56 @@ Run this after migration to ensure everything works.
 """
 import sys
 import os
+import io
+import functools
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from dotenv import load_dotenv
-load_dotenv()
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from services.api.sql_client import SQLClient
 
+_client_lock = threading.Lock()
 
 
+@functools.lru_cache(maxsize=1)
+def _build_client():
+    # Imported here so tests that don't need the client skip its import cost
+    from services.api.sql_client import SQLClient
+    # Fresh SQL cache per run: a persisted one would answer the generation
+    # checks from an earlier run without ever calling the LLM
+    cache_path = os.path.join(tempfile.mkdtemp(), "sql_cache.json")
+    return SQLClient(sql_cache_path=cache_path)
+
+
+def _client():
+    """One SQLClient shared by all tests (schema + golden queries load once)."""
+    # Tests run in parallel; the lock keeps them from building two clients
+    with _client_lock:
+        return _build_client()
+
+
+class _ThreadLocalStdout(io.TextIOBase):
+    """Sends print() output to a per-thread buffer while one is set."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def capture(self, buf):
+        self._local.buf = buf
+
+    def release(self):
+        self._local.buf = None
+
+    def write(self, s):
+        return (getattr(self._local, "buf", None) or self._default).write(s)
+
+    def flush(self):
+        self._default.flush()
+
 
 def test_basic_generation():
     """Test 1: Basic SQL generation"""
@@ -23,7 +62,7 @@ def test_basic_generation():
     print("TEST 1: Basic SQL Generation")
     print("="*60)
     
-    client = SQLClient()
+    client = _client()
     
     question = "What is the approval time in days for the invoice with the longest approval time?"
     print(f"\nQuestion: {question}")
@@ -55,7 +94,7 @@ def test_golden_query_system():
     print("TEST 2: Golden Query System")
     print("="*60)
     
-    client = SQLClient()
+    client = _client()
     
     # This should match the default golden query
     question = "What is the approval time in days for the invoice with the longest approval time?"
@@ -99,9 +138,9 @@ def test_compression():
     ]
     
     print("\n✓ Compression Tests:")
-    for query in test_queries:
-        compressed = compressor.compress(query)
-        original_size = len(compressor.full_doc)
+    original_size = len(compressor.full_doc)
+    compressed_docs = compressor.compress_batch(test_queries)
+    for query, compressed in zip(test_queries, compressed_docs):
         compressed_size = len(compressed)
         reduction = ((original_size - compressed_size) / original_size) * 100
         
@@ -118,9 +157,8 @@ def test_validation():
     print("TEST 4: SQL Validator")
     print("="*60)
     
-    from services.api.sql_validator import SQLValidator
+    from services.api.sql_validator import VALIDATOR as validator
     
-    validator = SQLValidator()
     
     # Test bad SQL
     bad_sql = """
@@ -142,6 +180,9 @@ def test_validation():
 
 def main():
     """Run all tests"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
     print("\n" + "="*60)
     print("ENHANCED SQL GENERATION SYSTEM - TEST SUITE")
     print("="*60)
@@ -153,14 +194,44 @@ def main():
         ("SQL Validation", test_validation)
     ]
     
-    results = []
-    for name, test_func in tests:
+    # Tests mostly wait on the LLM / embeddings, so they run concurrently;
+    # each one's output is buffered and printed in one piece when it
+    # finishes. Tests 1 and 2 send the same question to the shared client,
+    # so they run back to back: the second is then served from the SQL
+    # cache instead of racing the first to the LLM.
+    groups = [tests[:2]] + [[test] for test in tests[2:]]
+
+    original_stdout = sys.stdout
+    stdout = _ThreadLocalStdout(original_stdout)
+
+    def run(name, test_func):
+        buf = io.StringIO()
+        stdout.capture(buf)
         try:
             passed = test_func()
-            results.append((name, passed))
         except Exception as e:
             print(f"\n✗ Test '{name}' failed with error: {e}")
-            results.append((name, False))
+            passed = False
+        finally:
+            stdout.release()
+        return name, passed, buf.getvalue()
+
+    def run_group(group):
+        return [run(name, test_func) for name, test_func in group]
+
+    outcome = {}
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=len(groups)) as ex:
+            futures = [ex.submit(run_group, group) for group in groups]
+            for future in as_completed(futures):
+                for name, passed, output in future.result():
+                    print(output, end="")
+                    outcome[name] = passed
+    finally:
+        sys.stdout = original_stdout
+
+    results = [(name, outcome[name]) for name, _ in tests]
     
     # Summary
     print("\n" + "="*60)
@@ -1,10 +1,51 @@
 import json
 from pathlib import Path
 
+from tools.prepare_schema_from_mdl import parse_mdl
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 def test_mdl_schema_generated():
-    path = Path("data/schemas_from_mdl.json")
+    path = Path("data/schemas/schemas_from_mdl.json")
     assert path.exists()
 
-    data = json.loads(path.read_text())
+    data = _json_loads(path.read_bytes())
     assert "entities" in data
     assert len(data["entities"]) > 0
+
+
+def test_parse_mdl_keeps_nested_braces_in_entity_body():
+    mdl = b"""
+    entity invoice {
+        column id: bigint [pk]
+        index { column nested_col: int }
+        column amount: decimal
+    }
+    entity vendor {
+        column id: bigint
+    }
+    """
+    entities = parse_mdl(mdl, "s")
+
+    assert set(entities) == {"s.invoice", "s.vendor"}
+    # Body runs to the matching brace, past the nested block
+    names = [c["name"] for c in entities["s.invoice"]["columns"]]
+    assert names == ["id", "nested_col", "amount"]
+
+
+def test_parse_mdl_skips_unclosed_entity():
+    mdl = b"""
+    entity broken { {
+        column id: bigint
+    entity vendor {
+        column id: bigint
+    }
+    """
+    entities = parse_mdl(mdl, "s")
+
+    assert list(entities) == ["s.vendor"]
+    assert [c["name"] for c in entities["s.vendor"]["columns"]] == ["id"]
@@ -0,0 +1,16 @@
+from services.api.sql_refiner import refine_sql
+
+
+def test_quick_code_join_rewrites_only_quick_code_on_clauses():
+    sql = (
+        "SELECT w.name FROM warehouse_info w "
+        "JOIN users u ON u.id = ii.user_id "
+        "JOIN quick_code_master q ON w.zone_id = q.code "
+        "LIMIT 10"
+    )
+    refined = refine_sql(sql)
+
+    # Joins to other tables are left alone
+    assert "JOIN users u ON u.id = ii.user_id " in refined
+    # The quick_code_master join is pointed at its primary key
+    assert "JOIN quick_code_master q ON w.zone_id = q.id " in refined
@@ -14,8 +14,6 @@ import os
 import tempfile
 import json
 import pytest
-import pandas as pd
-from sqlalchemy import create_engine, text
 
 from services.api.sql_client import SQLClient
 
@@ -61,24 +59,28 @@ def test_validate_sql_rejects_write_ops():
         vc.validate_sql("SELECT * FROM invoices LIMIT 20000")
 
 
-def test_execute_sql_with_inmemory_sqlite(tmp_path):
+def test_execute_sql_with_inmemory_sqlite(sqlite_engine):
     """
     Use an in-memory sqlite DB for a real execution test.
-    VannaClient supports db_url_override for testing.
+    The session-wide engine (see conftest.py) is handed to the client directly.
     """
-    # create sqlite file-based DB (safer than pure :memory: to allow multiple connections)
-    sqlite_path = tmp_path / "test.db"
-    engine = create_engine(f"sqlite:///{sqlite_path}")
-    with engine.begin() as conn:
-        conn.execute(text("CREATE TABLE demo (id INTEGER PRIMARY KEY, name TEXT)"))
-        conn.execute(text("INSERT INTO demo (name) VALUES ('alice'), ('bob')"))
-
-    # provider that returns a safe SELECT with LIMIT
-    def provider(q, s):
-        return "SELECT id, name FROM demo LIMIT 10"
-
-    vc = SQLClient(model_provider=provider, db_url_override=f"sqlite:///{sqlite_path}")
+    vc = SQLClient(engine=sqlite_engine)
+    tbl = vc.execute_sql_arrow("SELECT id, name FROM demo LIMIT 10")
+    assert tbl.num_rows == 2
+    assert tbl.column_names == ["id", "name"]
+
+
+def test_ask_returns_arrow_or_pandas(sqlite_engine, monkeypatch):
+    vc = SQLClient(engine=sqlite_engine)
+    monkeypatch.setattr(vc, "generate_sql", lambda question: "SELECT id, name FROM demo")
+
+    tbl = vc.ask("list demo rows", return_format="arrow")
+    assert tbl.num_rows == 2
+    assert tbl.column_names == ["id", "name"]
+
     df = vc.ask("list demo rows")
-    assert isinstance(df, pd.DataFrame)
-    assert len(df) == 2
-    assert set(df.columns) == {"id", "name"}
+    assert list(df.columns) == ["id", "name"]
+    assert sorted(df["name"]) == ["alice", "bob"]
+
+    with pytest.raises(ValueError):
+        vc.ask("list demo rows", return_format="csv")
@@ -1,73 +1,164 @@
 import os
 import json
+import hashlib
+import mmap
 import re
 from pathlib import Path
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+
+def _json_loads(data: bytes):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj, indent=False) -> bytes:
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+# Bytes patterns: MDL files are scanned straight from an mmap.
+# Negated classes instead of lazy '.*?' (same matches, no backtracking):
+# an annotation runs to the first ']' on the same line, unique key
+# columns to the first ')' on the same line. '\r' counts as a line end,
+# as it did when files were read in text mode.
+# Only the entity header is a regex; its body is found by _BRACE_REGEX.
 ENTITY_REGEX = re.compile(
-    r"entity\s+(\w+)\s*\{(.*?)\}",
-    re.DOTALL | re.IGNORECASE
+    rb"entity\s+(\w+)\s*\{",
+    re.IGNORECASE
 )
 
+_BRACE_REGEX = re.compile(rb"[{}]")
+
 COLUMN_REGEX = re.compile(
-    r"column\s+(\w+)\s*:\s*([a-zA-Z0-9_\(\)\'\,]+)\s*(\[.*?\])?",
+    rb"column\s+(\w+)\s*:\s*([a-zA-Z0-9_\(\)\'\,]+)\s*(\[[^\]\r\n]*\])?",
     re.IGNORECASE
 )
 
 FOREIGN_KEY_REGEX = re.compile(
-    r"foreign_key\s+(\w+)\s+references\s+(\w+)\((\w+)\)",
+    rb"foreign_key\s+(\w+)\s+references\s+(\w+)\((\w+)\)",
     re.IGNORECASE
 )
 
 UNIQUE_KEY_REGEX = re.compile(
-    r"unique_key\s+(\w+)\s*\((.*?)\)",
+    rb"unique_key\s+(\w+)\s*\(([^)\r\n]*)\)",
     re.IGNORECASE
 )
 
+# All body rules in one scan. Each rule sits in a zero-width lookahead,
+# so a match of one kind never hides an overlapping match of another;
+# m.lastgroup names the rule.
+_BODY_RULES = {
+    "col": COLUMN_REGEX,
+    "fk": FOREIGN_KEY_REGEX,
+    "uk": UNIQUE_KEY_REGEX,
+}
+
+BODY_REGEX = re.compile(
+    b"|".join(
+        b"(?=(?P<" + name.encode() + b">" + rx.pattern + b"))"
+        for name, rx in _BODY_RULES.items()
+    ),
+    re.IGNORECASE
+)
 
-def parse_mdl(text, schema_name):
+
+def _text(token: bytes) -> str:
+    return token.decode("utf-8", errors="ignore")
+
+
+def _entity_bodies(data):
+    """
+    Yield (entity_name, body_start, body_end) for each entity, with the
+    body running to its matching '}' so nested braces stay inside it.
+    An entity whose braces never close is skipped, and the scan picks up
+    again right after its header.
+    """
+    pos = 0
+    while True:
+        em = ENTITY_REGEX.search(data, pos)
+        if em is None:
+            return
+
+        body_start = em.end()
+        depth = 1
+        bm = None
+        for bm in _BRACE_REGEX.finditer(data, body_start):
+            depth += 1 if bm.group() == b"{" else -1
+            if depth == 0:
+                break
+        if depth:
+            pos = body_start
+            continue
+
+        yield em.group(1), body_start, bm.start()
+        pos = bm.end()
+
+
+def parse_mdl(data, schema_name):
+    """
+    Parse MDL entities from bytes or any buffer (e.g. an mmap).
+    Only the captured tokens are decoded to str.
+    """
     entities = {}
 
-    for em in ENTITY_REGEX.finditer(text):
-        entity_name = em.group(1)
-        body = em.group(2)
+    for name, body_start, body_end in _entity_bodies(data):
+        entity_name = _text(name)
 
         columns = []
         foreign_keys = []
         unique_keys = []
 
-        # Parse columns
-        for cm in COLUMN_REGEX.finditer(body):
-            col_name = cm.group(1)
-            col_type = cm.group(2)
-            annotation = cm.group(3) or ""
-            annotation = annotation.strip("[]") if annotation else ""
-
-            columns.append({
-                "name": col_name,
-                "type": col_type,
-                "annotation": annotation
-            })
-
-        # Parse foreign keys
-        for fk in FOREIGN_KEY_REGEX.finditer(body):
-            local_col = fk.group(1)
-            ref_table = fk.group(2)
-            ref_col = fk.group(3)
-            foreign_keys.append({
-                "column": local_col,
-                "references": f"{ref_table}.{ref_col}"
-            })
-
-        # Parse unique keys
-        for uk in UNIQUE_KEY_REGEX.finditer(body):
-            uk_name = uk.group(1)
-            cols = [c.strip() for c in uk.group(2).split(",")]
-            unique_keys.append({
-                "name": uk_name,
-                "columns": cols
-            })
+        # Like separate finditer() passes over the body, a rule resumes
+        # only after the end of its own previous match
+        resume_at = dict.fromkeys(_BODY_RULES, body_start)
+
+        for bm in BODY_REGEX.finditer(data, body_start, body_end):
+            kind = bm.lastgroup
+            if bm.start() < resume_at[kind]:
+                continue
+            resume_at[kind] = bm.end(kind)
+            m = _BODY_RULES[kind].match(data, bm.start(), body_end)
+
+            # Parse columns
+            if kind == "col":
+                col_name = _text(m.group(1))
+                col_type = _text(m.group(2))
+                annotation = _text(m.group(3) or b"")
+                annotation = annotation.strip("[]") if annotation else ""
+
+                columns.append({
+                    "name": col_name,
+                    "type": col_type,
+                    "annotation": annotation
+                })
+
+            # Parse foreign keys
+            elif kind == "fk":
+                local_col = _text(m.group(1))
+                ref_table = _text(m.group(2))
+                ref_col = _text(m.group(3))
+                foreign_keys.append({
+                    "column": local_col,
+                    "references": f"{ref_table}.{ref_col}"
+                })
+
+            # Parse unique keys
+            else:
+                uk_name = _text(m.group(1))
+                cols = [c.strip() for c in _text(m.group(2)).split(",")]
+                unique_keys.append({
+                    "name": uk_name,
+                    "columns": cols
+                })
 
         fq_name = f"{schema_name}.{entity_name}"
 
@@ -82,27 +173,86 @@ def parse_mdl(text, schema_name):
     return entities
 
 
-def main(mdl_dir, out_file):
+# Part of every cache key; bump whenever parse_mdl() output can change
+PARSER_VERSION = 2
+
+
+def _cache_path(mdl_file, data):
+    # Content hash in the name: an edited file misses the cache, while a
+    # touched or freshly checked-out file with the same bytes still hits
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return mdl_file.parent / ".cache" / f"{mdl_file.stem}-v{PARSER_VERSION}-{digest}.json"
+
+
+def _parse_cached(mdl_file, schema_name, data):
+    # The cache is only a speed-up: any failure falls back to parsing
+    cache_path = _cache_path(mdl_file, data)
+    try:
+        return _json_loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        pass
+
+    parsed = parse_mdl(data, schema_name)
+
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        # Write-then-rename: a concurrent run never reads a partial entry
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(_json_dumps(parsed))
+        os.replace(tmp_path, cache_path)
+        for stale in cache_path.parent.glob(f"{mdl_file.stem}-*.json"):
+            if stale != cache_path:
+                stale.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"[!] Could not cache {mdl_file.name}: {e}")
+    return parsed
+
+
+def parse_mdl_file(mdl_file, schema_name):
+    """parse_mdl() for one file, reusing the on-disk result if unchanged."""
+    with mdl_file.open("rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            return _parse_cached(mdl_file, schema_name, b"")
+        with mm:
+            return _parse_cached(mdl_file, schema_name, mm)
+
+
+def _parse_one(path):
+    mdl_file = Path(path)
+
+    # Convert filename: ems_account_service -> ems-account
+    # ems_account_service -> ems-account-service
+    schema_name = mdl_file.stem.replace("_", "-")
+
+    return parse_mdl_file(mdl_file, schema_name)
+
+
+def main(mdl_dir, out_file, pretty=False):
     mdl_dir = Path(mdl_dir)
-    combined = {}
 
-    for mdl_file in mdl_dir.glob("*.mdl"):
+    mdl_files = [str(p) for p in mdl_dir.glob("*.mdl")]
+    for mdl_file in mdl_files:
         print(f"[+] Reading {mdl_file}")
 
-        # Convert filename: ems_account_service -> ems-account
-        # ems_account_service -> ems-account-service
-        schema_name = mdl_file.stem.replace("_", "-")
-
+    # Files parse independently; a pool only pays off for 2+ files.
+    # map() keeps glob order, so later files still win on merge.
+    if len(mdl_files) >= 2:
+        with ProcessPoolExecutor() as ex:
+            parsed_list = list(ex.map(_parse_one, mdl_files))
+    else:
+        parsed_list = [_parse_one(mdl_file) for mdl_file in mdl_files]
 
-        text = mdl_file.read_text(errors="ignore")
-        parsed = parse_mdl(text, schema_name)
-        combined.update(parsed)
+    # One merge after collecting, instead of growing via update() per file
+    combined = {k: v for parsed in parsed_list for k, v in parsed.items()}
 
     out_file = Path(out_file)
     out_file.parent.mkdir(parents=True, exist_ok=True)
 
-    with out_file.open("w") as f:
-        json.dump({"entities": combined}, f, indent=2)
+    # Compact by default; indented output is 2-3x larger
+    out_file.write_bytes(_json_dumps({"entities": combined}, indent=pretty))
 
     print(f"[✔] Parsed {len(combined)} fully qualified entities")
     print(f"[✔] Wrote: {out_file}")
@@ -112,5 +262,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--mdl", required=True)
     parser.add_argument("--out", required=True)
+    parser.add_argument("--pretty", action="store_true",
+                        help="indent the output JSON")
     args = parser.parse_args()
-    main(args.mdl, args.out)
+    main(args.mdl, args.out, pretty=args.pretty)